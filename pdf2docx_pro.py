@@ -1,167 +1,463 @@
 import os
 import fitz  # PyMuPDF
-from pdf2image import convert_from_path
-from paddleocr import PaddleOCR
 from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
 import numpy as np
-import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import functools
+import copy
+import threading
+from queue import Empty, Full, Queue
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import argparse
 import logging
 
 # Set logging level
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Initialize PaddleOCR model with improved settings
-# Using only the most basic parameters to ensure compatibility
-ocr = PaddleOCR(
-    use_textline_orientation=True,  # Use the new parameter instead of use_angle_cls
-    lang='ch'  # Support both Chinese and English
-)
+# Maximum number of pages waiting between pipeline stages in OCR mode
+PIPELINE_QUEUE_SIZE = 4
+
+# How often (seconds) blocked pipeline stages check whether they should stop
+QUEUE_POLL_INTERVAL = 0.1
+
+# Translation table deleting all Unicode whitespace (the same characters as
+# the regex \s); none of them lie above U+3000, the ideographic space
+_WS_TABLE = dict.fromkeys(i for i in range(0x3001) if chr(i).isspace())
+
+# Resolution pages are rendered at for OCR. The detector shrinks images to
+# at most det_side_len pixels anyway, so higher values mostly cost memory
+DEFAULT_OCR_DPI = 200
+DEFAULT_DET_SIDE_LEN = 1920
+
+# Empty document copied by new_document, so the default template is only
+# read from disk once
+_TEMPLATE = Document()
+
+# Recognition batch size used on GPU when --rec_batch_num is not given
+DEFAULT_GPU_REC_BATCH_NUM = 32
+
+# OCR settings chosen on the command line, see set_ocr_options
+_ocr_options = {'device': None, 'rec_batch_num': None, 'use_cls': True,
+                'dpi': DEFAULT_OCR_DPI, 'det_side_len': DEFAULT_DET_SIDE_LEN,
+                'use_mkldnn': True, 'cpu_threads': None}
+
+def set_ocr_options(**options):
+    """Update the OCR settings used by models created in this process and in workers"""
+    _ocr_options.update(options)
+
+def _resolve_device(device):
+    """Return 'cpu' or 'gpu', detecting the device when none was requested"""
+    if device:
+        return device
+    import paddle
+    return 'cpu' if paddle.device.get_device() == 'cpu' else 'gpu'
+
+def _worker_init(ocr_options):
+    """Pass the OCR settings on to a worker process"""
+    set_ocr_options(**ocr_options)
+
+@functools.lru_cache(maxsize=1)
+def get_ocr():
+    """Return the PaddleOCR model of this process, creating it on first use
+    
+    PaddleOCR is imported here so runs that never need OCR do not pay for
+    loading it. The call site and result parsing follow the PaddleOCR 2.x
+    API, see requirements.txt.
+    """
+    from paddleocr import PaddleOCR
+    device = _resolve_device(_ocr_options['device'])
+    rec_batch_num = _ocr_options['rec_batch_num']
+    if rec_batch_num is None:
+        # On CPU batches run one after another, so larger batches only grow memory
+        rec_batch_num = 1 if device == 'cpu' else DEFAULT_GPU_REC_BATCH_NUM
+    cpu_options = {}
+    if device == 'cpu':
+        # Use MKL-DNN kernels and share the cores between the worker processes
+        cpu_options = {'enable_mkldnn': _ocr_options['use_mkldnn'],
+                       'cpu_threads': _ocr_options['cpu_threads'] or os.cpu_count() or 1}
+    # Initialize PaddleOCR model with improved settings
+    # Using only the most basic parameters to ensure compatibility
+    return PaddleOCR(
+        use_angle_cls=_ocr_options['use_cls'],
+        lang='ch',  # Support both Chinese and English
+        use_gpu=device == 'gpu',
+        det_limit_side_len=_ocr_options['det_side_len'],
+        det_limit_type='max',
+        rec_batch_num=rec_batch_num,
+        **cpu_options
+    )
+
+def count_valid_chars(text):
+    """Count the non-whitespace characters in text"""
+    return len(text.translate(_WS_TABLE))
+
+def has_valid_ratio(valid_chars, total_chars, min_valid_ratio=0.1):
+    """Check if enough of total_chars are valid, see is_valid_content"""
+    return valid_chars / total_chars > min_valid_ratio if total_chars > 0 else False
 
 def is_valid_content(text, min_valid_ratio=0.1):
     """Check if the text contains enough valid content"""
-    total_chars = len(text)
-    valid_chars = len(re.findall(r'\S', text))  # non-whitespace characters
-    return valid_chars / total_chars > min_valid_ratio if total_chars > 0 else False
+    return has_valid_ratio(count_valid_chars(text), len(text), min_valid_ratio)
+
+def new_document():
+    """Create an empty document by copying a template parsed once per process"""
+    return copy.deepcopy(_TEMPLATE)
+
+def make_paragraph(text=''):
+    """Build a paragraph element holding text, like Document.add_paragraph"""
+    p = OxmlElement('w:p')
+    if text:
+        p.add_r().text = text
+    return p
+
+def make_page_break():
+    """Build a paragraph element holding a page break, like Document.add_page_break"""
+    p = OxmlElement('w:p')
+    p.add_r().add_br().type = 'page'
+    return p
+
+def append_to_body(doc, elements):
+    """Append paragraph elements to the end of the document body
+    
+    Document.add_paragraph searches the whole body for the section properties
+    on every call, which makes building long documents quadratic.
+    """
+    body = doc.element.body
+    # The section properties must remain the last element of the body
+    last = next(body.iterchildren(reversed=True), None)
+    if last is not None and last.tag == qn('w:sectPr'):
+        for element in elements:
+            last.addprevious(element)
+    else:
+        body.extend(elements)
+
+class DocxWriter:
+    """Write the pages of a PDF to a DOCX file, page by page
+    
+    When max_pages is set and the PDF is longer, the pages are split over
+    name.part1.docx, name.part2.docx, ... Each part is saved and released as
+    soon as it is full, so memory use no longer grows with the page count.
+    """
+    
+    def __init__(self, docx_path, page_count, max_pages=0):
+        self.docx_path = docx_path
+        self.max_pages = max_pages if max_pages and page_count > max_pages else 0
+        self.paths = []
+        self.doc = new_document()
+        self.pages_in_doc = 0
+    
+    def _part_path(self):
+        root, ext = os.path.splitext(self.docx_path)
+        return f"{root}.part{len(self.paths) + 1}{ext}"
+    
+    def _save(self):
+        path = self._part_path() if self.max_pages else self.docx_path
+        self.doc.save(path)
+        self.paths.append(path)
+    
+    def add_page(self, elements):
+        """Add the paragraph elements of the next page, after a page break"""
+        if self.max_pages and self.pages_in_doc == self.max_pages:
+            self._save()
+            self.doc = new_document()
+            self.pages_in_doc = 0
+        if self.pages_in_doc:
+            elements = [make_page_break()] + elements
+        append_to_body(self.doc, elements)
+        self.pages_in_doc += 1
+    
+    def close(self):
+        """Save the remaining pages and return the total size of the output in bytes"""
+        self._save()
+        self.doc = None
+        return sum(os.path.getsize(path) for path in self.paths)
+    
+    def discard(self):
+        """Remove the files saved so far, e.g. when the output is replaced"""
+        remove_files(self.paths)
+        self.paths = []
+
+def remove_files(paths):
+    """Remove the given output files, ignoring ones that no longer exist"""
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+def put_until(q, item, give_up):
+    """Put item on a bounded queue, giving up once the give_up event is set
+    
+    Returns:
+        bool: True if the item was queued
+    """
+    while True:
+        try:
+            q.put(item, timeout=QUEUE_POLL_INTERVAL)
+            return True
+        except Full:
+            if give_up.is_set():
+                return False
+
+def group_paragraphs(tops, bottoms, thresh):
+    """Assign a paragraph id to each text line, given lines sorted top to bottom
+    
+    A line starts a new paragraph when its top is more than thresh away from
+    the bottom of the previous line.
+    """
+    paragraph_ids = np.empty(tops.shape[0], dtype=np.int64)
+    current = 0
+    for i in range(tops.shape[0]):
+        if i > 0 and abs(tops[i] - bottoms[i - 1]) > thresh:
+            current += 1
+        paragraph_ids[i] = current
+    return paragraph_ids
+
+def _group_paragraphs_numpy(tops, bottoms, thresh):
+    """Vectorized group_paragraphs for when Numba is not installed"""
+    paragraph_ids = np.zeros(tops.shape[0], dtype=np.int64)
+    np.cumsum(np.abs(tops[1:] - bottoms[:-1]) > thresh, out=paragraph_ids[1:])
+    return paragraph_ids
+
+@functools.lru_cache(maxsize=1)
+def get_paragraph_grouper():
+    """Return group_paragraphs compiled with Numba, or a NumPy version without it
+    
+    Numba is optional and, like PaddleOCR, only imported once OCR output
+    needs grouping. cache=True keeps the compiled code between runs.
+    """
+    try:
+        from numba import njit
+    except ImportError:
+        return _group_paragraphs_numpy
+    return njit(cache=True)(group_paragraphs)
+
+def ocr_result_to_paragraphs(page_result):
+    """Group the OCR text lines of one page into paragraphs"""
+    # Skip low confidence text
+    blocks = [block for block in page_result if block[1][1] >= 0.6]  # Arbitrary threshold
+    if not blocks:
+        return []
+    
+    # Top and bottom y-coordinates of each text line
+    coords = np.array([[block[0][0][1], block[0][2][1]] for block in blocks], dtype=np.float64)
+    
+    # Sort text blocks by vertical position (top to bottom)
+    # This helps maintain the reading order
+    order = np.argsort(coords[:, 0], kind='stable')
+    coords = coords[order]
+    
+    # Start a new paragraph wherever the vertical spacing to the previous line is large
+    paragraph_ids = get_paragraph_grouper()(coords[:, 0], coords[:, 1], 20.0)  # Arbitrary threshold
+    splits = np.flatnonzero(np.diff(paragraph_ids)) + 1
+    
+    return [" ".join(blocks[i][1][0] for i in group) for group in np.split(order, splits)]
 
-def convert_pdf_to_docx_with_ocr(pdf_path, docx_path):
-    """Convert PDF to DOCX using OCR with improved text organization"""
+def convert_pdf_to_docx_with_ocr(pdf_path, docx_path, max_pages=0):
+    """Convert PDF to DOCX using OCR with improved text organization
+    
+    Pages are rendered in-process with PyMuPDF. Rendering, OCR and DOCX
+    writing run as a pipeline connected by bounded queues, so only a few
+    rendered pages are held in memory at a time.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        docx_path: Path to the output DOCX file
+        max_pages: Split the output into parts of this many pages (0 to disable)
+    
+    Returns:
+        Tuple of (docx_size, output_paths) with the total size in bytes and
+        the DOCX files written
+    """
     logging.info(f"Processing with OCR: {pdf_path}")
-    doc = Document()
+    render_q = Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    ocr_q = Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    # stop ends the work of every stage; closed tells the workers that the
+    # writer no longer reads ocr_q
+    stop = threading.Event()
+    closed = threading.Event()
+    errors = []
+    
+    def render_worker():
+        """Stage A: render pages one at a time"""
+        try:
+            for page_num, page in enumerate(pdf_document):
+                if stop.is_set():
+                    break
+                pix = page.get_pixmap(dpi=_ocr_options['dpi'], colorspace=fitz.csRGB, alpha=False)
+                # View the pixmap memory directly instead of copying it out;
+                # the pixmap travels with the array because it owns the buffer
+                image_np = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+                if not put_until(render_q, (page_num, image_np, pix), stop):
+                    break
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put_until(render_q, None, stop)
+    
+    def ocr_worker():
+        """Stage B: run OCR on rendered pages as they arrive"""
+        try:
+            while not stop.is_set():
+                try:
+                    item = render_q.get(timeout=QUEUE_POLL_INTERVAL)
+                except Empty:
+                    continue
+                if item is None:
+                    break
+                page_num, image_np, _ = item
+                logging.info(f"OCR processing page {page_num+1}/{page_count}")
+                # Run OCR with confidence scores
+                result = get_ocr().ocr(image_np, cls=_ocr_options['use_cls'])
+                if not put_until(ocr_q, (page_num, result[0] if result else None), closed):
+                    break
+        except BaseException as e:
+            # Also record SystemExit and the like, which would otherwise end
+            # the thread and leave an empty document looking successful
+            errors.append(e)
+            stop.set()
+        finally:
+            put_until(ocr_q, None, closed)
+    
+    threads = []
+    pdf_document = None
+    writer = None
     try:
-        # Use higher DPI for better OCR quality
-        pages = convert_from_path(pdf_path, dpi=400, first_page=1, last_page=None)
+        pdf_document = fitz.open(pdf_path)
+        page_count = pdf_document.page_count
+        writer = DocxWriter(docx_path, page_count, max_pages)
+        threads = [threading.Thread(target=render_worker, daemon=True),
+                   threading.Thread(target=ocr_worker, daemon=True)]
+        for thread in threads:
+            thread.start()
         
-        for page_num, page in enumerate(pages):
-            logging.info(f"OCR processing page {page_num+1}/{len(pages)}")
-            image_np = np.array(page.convert('RGB'))
-            
-            # Run OCR with confidence scores
-            result = ocr.ocr(image_np, cls=True)
-            
-            if result and result[0]:
-                # Sort text blocks by vertical position (top to bottom)
-                # This helps maintain the reading order
-                sorted_blocks = sorted(result[0], key=lambda x: x[0][0][1])  # Sort by y-coordinate of first point
-                
-                # Group text lines that are likely to be in the same paragraph
-                paragraphs = []
-                current_paragraph = []
-                last_y = None
-                
-                for block in sorted_blocks:
-                    # Extract text and confidence
-                    text, confidence = block[1]
-                    
-                    # Skip low confidence text
-                    if confidence < 0.6:  # Arbitrary threshold
-                        continue
-                        
-                    # Get coordinates
-                    coords = block[0]
-                    y_coord = coords[0][1]  # Top y-coordinate
-                    
-                    # If this is a new paragraph (based on vertical spacing)
-                    if last_y is not None and abs(y_coord - last_y) > 20:  # Arbitrary threshold
-                        if current_paragraph:
-                            paragraphs.append(" ".join(current_paragraph))
-                            current_paragraph = []
-                    
-                    current_paragraph.append(text)
-                    last_y = coords[2][1]  # Bottom y-coordinate
-                
-                # Add the last paragraph
-                if current_paragraph:
-                    paragraphs.append(" ".join(current_paragraph))
-                
-                # Add paragraphs to document
-                for paragraph_text in paragraphs:
-                    doc.add_paragraph(paragraph_text)
-            else:
-                # If OCR failed to detect any text
-                doc.add_paragraph(f"[OCR could not extract text from page {page_num+1}]")
-            
-            # Add page break after each page except the last one
-            if page_num < len(pages) - 1:
-                doc.add_page_break()
+        # Stage C: write pages in order, buffering any that arrive early
+        pending = {}
+        next_page = 0
+        while True:
+            item = ocr_q.get()
+            if item is None:
+                break
+            page_num, page_result = item
+            pending[page_num] = page_result
+            while next_page in pending:
+                page_result = pending.pop(next_page)
+                if page_result:
+                    # Add paragraphs to document
+                    elements = [make_paragraph(paragraph_text)
+                                for paragraph_text in ocr_result_to_paragraphs(page_result)]
+                else:
+                    # If OCR failed to detect any text
+                    elements = [make_paragraph(f"[OCR could not extract text from page {next_page+1}]")]
+                writer.add_page(elements)
+                next_page += 1
+        
+        if errors:
+            if isinstance(errors[0], Exception):
+                raise errors[0]
+            raise RuntimeError(f"OCR pipeline stopped: {errors[0]!r}")
         
-        doc.save(docx_path)
-        logging.info(f"OCR processing completed and saved to {docx_path}")
+        docx_size = writer.close()
+        logging.info(f"OCR processing completed and saved to {', '.join(writer.paths)}")
+        return docx_size, writer.paths
     except Exception as e:
         logging.error(f"Error processing PDF with OCR: {pdf_path}")
         logging.error(f"Error details: {str(e)}")
+        # Drop any parts already written so only the error document remains
+        if writer is not None:
+            writer.discard()
         # Create a document with error information
-        error_doc = Document()
+        error_doc = new_document()
         error_doc.add_paragraph(f"Error processing PDF with OCR: {str(e)}")
         error_doc.save(docx_path)
+        return os.path.getsize(docx_path), [docx_path]
+    finally:
+        # Let the workers finish if the writer stopped early; they notice
+        # within QUEUE_POLL_INTERVAL, or once the current page is done
+        stop.set()
+        closed.set()
+        for thread in threads:
+            thread.join()
+        if pdf_document is not None:
+            pdf_document.close()
+
+def extract_page_text(page):
+    """Extract the text of a PDF page, one line of text per line
+    
+    Plain text mode is tried first. Only if that yields poor results is the
+    page parsed once more in dict mode, with images left out because only
+    the text is used.
+    """
+    text = page.get_text("text")
+    if len(text) >= 50 and is_valid_content(text):  # Arbitrary threshold
+        return text
+    
+    page_dict = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)
+    return "\n".join("".join(span["text"] for span in line["spans"])
+                     for block in page_dict["blocks"] if "lines" in block
+                     for line in block["lines"])
 
-def convert_pdf_to_docx(pdf_path, docx_path):
-    """Convert PDF to DOCX, use OCR if MuPDF error occurs or text extraction is poor"""
+def convert_pdf_to_docx(pdf_path, docx_path, max_pages=0):
+    """Convert PDF to DOCX, use OCR if MuPDF error occurs or text extraction is poor
+    
+    Args:
+        pdf_path: Path to the PDF file
+        docx_path: Path to the output DOCX file
+        max_pages: Split the output into parts of this many pages (0 to disable)
+    
+    Returns:
+        Tuple of (used_ocr, docx_size, output_paths) so callers can validate
+        the result without reopening the DOCX
+    """
+    writer = None
     try:
-        doc = Document()
+        total_chars = valid_chars = 0
         with fitz.open(pdf_path) as pdf_document:
+            writer = DocxWriter(docx_path, pdf_document.page_count, max_pages)
             for page_num, page in enumerate(pdf_document):
-                # Try different text extraction methods
-                text = page.get_text("text")
-                
-                # If text extraction yields poor results, try blocks mode
-                if not text.strip() or len(text) < 50:  # Arbitrary threshold
-                    blocks = page.get_text("blocks")
-                    if blocks:
-                        text_blocks = [b[4] for b in blocks if len(b) > 4]
-                        text = "\n\n".join(text_blocks)
-                
-                # If still poor results, try dict mode which preserves more formatting
-                if not text.strip() or len(text) < 50:
-                    dict_text = page.get_text("dict")
-                    if dict_text and "blocks" in dict_text:
-                        text_parts = []
-                        for block in dict_text["blocks"]:
-                            if "lines" in block:
-                                for line in block["lines"]:
-                                    if "spans" in line:
-                                        line_text = " ".join(span["text"] for span in line["spans"] if "text" in span)
-                                        if line_text.strip():
-                                            text_parts.append(line_text)
-                        text = "\n".join(text_parts)
+                text = extract_page_text(page)
+                page_valid_chars = count_valid_chars(text)
                 
                 # If text is still not good, mark for OCR processing later
-                if not is_valid_content(text):
+                if not has_valid_ratio(page_valid_chars, len(text)):
                     logging.warning(f"Poor text extraction on page {page_num+1}, may need OCR")
                 
                 # Add the text to the document
-                doc.add_paragraph(text)
-                doc.add_page_break()
+                writer.add_page([make_paragraph(text)])
+                total_chars += len(text)
+                valid_chars += page_valid_chars
         
-        doc.save(docx_path)
+        # Check if the document has valid content overall, reusing the page counts
+        if not has_valid_ratio(valid_chars, total_chars, min_valid_ratio=0.2):
+            logging.warning(f"Poor overall text extraction, switching to OCR: {pdf_path}")
+            writer.discard()
+            docx_size, output_paths = convert_pdf_to_docx_with_ocr(pdf_path, docx_path, max_pages)
+            return True, docx_size, output_paths
         
-        # Check if the document has valid content overall
-        with open(docx_path, "rb") as f:
-            doc = Document(f)
-            total_text = " ".join([paragraph.text for paragraph in doc.paragraphs])
-            if not is_valid_content(total_text, min_valid_ratio=0.2):
-                logging.warning(f"Poor overall text extraction, switching to OCR: {pdf_path}")
-                convert_pdf_to_docx_with_ocr(pdf_path, docx_path)
+        return False, writer.close(), writer.paths
                 
     except fitz.fitz.FileDataError as e:
         logging.warning(f"MuPDF error, switching to OCR: {pdf_path}")
         logging.warning(f"Error details: {str(e)}")
-        convert_pdf_to_docx_with_ocr(pdf_path, docx_path)
+        docx_size, output_paths = convert_pdf_to_docx_with_ocr(pdf_path, docx_path, max_pages)
+        return True, docx_size, output_paths
     except Exception as e:
         logging.error(f"Error processing PDF: {pdf_path}")
         logging.error(f"Error details: {str(e)}")
+        return False, 0, writer.paths if writer is not None else []
 
-def process_file(file_path, output_folder, output_filename=None):
+def process_file(file_path, output_folder, output_filename=None, max_pages=0):
     """Process a single file
     
     Args:
         file_path: Path to the PDF file
         output_folder: Folder to save the output file
         output_filename: Optional specific output filename (without path)
+        max_pages: Split the output into parts of this many pages (0 to disable)
     
     Returns:
-        Tuple of (input_path, output_path) or None if processing failed
+        Tuple of (input_path, output_path, (used_ocr, docx_size, output_paths))
+        or None if processing failed
     """
     filename = os.path.basename(file_path)
     
@@ -172,21 +468,23 @@ def process_file(file_path, output_folder, output_filename=None):
     
     if file_path.endswith('.pdf'):
         logging.info(f"Converting PDF: {filename}")
-        convert_pdf_to_docx(file_path, docx_path)
-        return file_path, docx_path
+        status = convert_pdf_to_docx(file_path, docx_path, max_pages)
+        return file_path, docx_path, status
     else:
         return None
 
-def process_files(input_folder, output_folder, max_workers=4):
+def process_files(input_folder, output_folder, max_workers=4, max_pages=0):
     """Process all files in the folder"""
     processed_files = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    cpu_threads = max(1, (os.cpu_count() or 1) // max_workers)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_worker_init,
+                             initargs=(dict(_ocr_options, cpu_threads=cpu_threads),)) as executor:
         future_to_file = {}
-        for filename in os.listdir(input_folder):
-            file_path = os.path.join(input_folder, filename)
-            if filename.endswith('.pdf'):
-                future = executor.submit(process_file, file_path, output_folder, None)
-                future_to_file[future] = file_path
+        with os.scandir(input_folder) as entries:
+            for entry in entries:
+                if entry.name.endswith('.pdf') and entry.is_file():
+                    future = executor.submit(process_file, entry.path, output_folder, None, max_pages)
+                    future_to_file[future] = entry.path
 
         for future in as_completed(future_to_file):
             file_path = future_to_file[future]
@@ -200,40 +498,45 @@ def process_files(input_folder, output_folder, max_workers=4):
     
     return processed_files
 
-def check_and_fix_files(processed_files, size_threshold):
-    """Check and fix files based on size and content"""
-    for pdf_path, docx_path in processed_files:
-        need_ocr = False
-        
-        # Check file size
-        if os.path.getsize(docx_path) < size_threshold:
-            logging.warning(f"Found file smaller than {size_threshold/1024}KB: {docx_path}")
-            need_ocr = True
-        
-        # Check file content
-        if not need_ocr:
-            doc = Document(docx_path)
-            total_text = " ".join([paragraph.text for paragraph in doc.paragraphs])
-            if not is_valid_content(total_text):
-                logging.warning(f"File {docx_path} contains mainly blank content.")
-                need_ocr = True
-        
-        # Reprocess with OCR if needed
-        if need_ocr:
-            logging.info(f"Reprocessing PDF with OCR: {pdf_path}")
-            convert_pdf_to_docx_with_ocr(pdf_path, docx_path)
-            logging.info(f"Reprocessed and saved: {docx_path}")
+def check_and_fix_file(pdf_path, docx_path, status, size_threshold, max_pages=0):
+    """Reprocess a converted file with OCR if its output is too small
+    
+    The content itself was already validated during conversion, and files
+    that went through OCR are not run through it a second time.
+    
+    Returns:
+        List of the DOCX files that make up the final output
+    """
+    used_ocr, docx_size, output_paths = status
+    if used_ocr:
+        return output_paths
+    
+    # Check file size
+    if docx_size < size_threshold:
+        logging.warning(f"Found file smaller than {size_threshold/1024}KB: {docx_path}")
+        logging.info(f"Reprocessing PDF with OCR: {pdf_path}")
+        remove_files(output_paths)
+        _, output_paths = convert_pdf_to_docx_with_ocr(pdf_path, docx_path, max_pages)
+        logging.info(f"Reprocessed and saved: {', '.join(output_paths)}")
+    
+    return output_paths
+
+def check_and_fix_files(processed_files, size_threshold, max_pages=0):
+    """Check and fix converted files, see check_and_fix_file"""
+    for pdf_path, docx_path, status in processed_files:
+        check_and_fix_file(pdf_path, docx_path, status, size_threshold, max_pages)
 
-def process_single_file(input_file, output_file, size_threshold):
+def process_single_file(input_file, output_file, size_threshold, max_pages=0):
     """Process a single PDF file and validate the result
     
     Args:
         input_file: Path to the input PDF file
         output_file: Path to the output DOCX file
         size_threshold: Size threshold in bytes for quality check
+        max_pages: Split the output into parts of this many pages (0 to disable)
         
     Returns:
-        bool: True if processing was successful, False otherwise
+        list: The DOCX files written, empty if processing failed
     """
     logging.info(f"Processing single file: {input_file}")
     
@@ -244,37 +547,13 @@ def process_single_file(input_file, output_file, size_threshold):
     
     # Process the file with the specific output filename
     output_filename = os.path.basename(output_file)
-    result = process_file(input_file, output_dir, output_filename)
+    result = process_file(input_file, output_dir, output_filename, max_pages)
     if not result:
         logging.error(f"Failed to process file: {input_file}")
-        return False
-    
-    # Get the paths
-    pdf_path, docx_path = result
+        return []
     
     # Check and fix the file if needed
-    need_ocr = False
-    
-    # Check file size
-    if os.path.getsize(docx_path) < size_threshold:
-        logging.warning(f"Found file smaller than {size_threshold/1024}KB: {docx_path}")
-        need_ocr = True
-    
-    # Check file content
-    if not need_ocr:
-        doc = Document(docx_path)
-        total_text = " ".join([paragraph.text for paragraph in doc.paragraphs])
-        if not is_valid_content(total_text):
-            logging.warning(f"File {docx_path} contains mainly blank content.")
-            need_ocr = True
-    
-    # Reprocess with OCR if needed
-    if need_ocr:
-        logging.info(f"Reprocessing PDF with OCR: {input_file}")
-        convert_pdf_to_docx_with_ocr(input_file, docx_path)
-        logging.info(f"Reprocessed and saved: {docx_path}")
-    
-    return True
+    return check_and_fix_file(*result, size_threshold, max_pages)
 
 def main():
     parser = argparse.ArgumentParser(description="Convert PDF files to DOCX format")
@@ -288,10 +567,33 @@ def main():
     folder_group.add_argument("--output_folder", help="Output folder path for DOCX files")
     
     # Common arguments
-    parser.add_argument("--max_workers", type=int, default=4, help="Maximum number of worker threads (for batch processing)")
+    parser.add_argument("--max_workers", type=int, default=4, help="Maximum number of worker processes (for batch processing)")
     parser.add_argument("--size_threshold", type=int, default=15, help="Small file threshold (KB)")
+    parser.add_argument("--max_pages_per_docx", type=int, default=0,
+                        help="Split longer PDFs into name.part1.docx, name.part2.docx, ... of at most this many pages "
+                             "to bound memory use (default: 0, never split)")
+    
+    # OCR arguments
+    ocr_group = parser.add_argument_group('OCR settings')
+    ocr_group.add_argument("--device", choices=['cpu', 'gpu'], help="Device used for OCR (default: detected automatically)")
+    ocr_group.add_argument("--rec_batch_num", type=int,
+                           help="Text lines recognized per batch (default: 1 on CPU, 32 on GPU). "
+                                "On CPU batches run sequentially, so larger values only add memory; "
+                                "on GPU larger values are needed to keep the device busy")
+    ocr_group.add_argument("--no_cls", dest="use_cls", action="store_false",
+                           help="Skip the text line orientation classifier (faster for upright documents)")
+    ocr_group.add_argument("--ocr_dpi", type=int, default=DEFAULT_OCR_DPI,
+                           help=f"Resolution pages are rendered at for OCR (default: {DEFAULT_OCR_DPI}). "
+                                "Raise it for documents with very small print")
+    ocr_group.add_argument("--det_side_len", type=int, default=DEFAULT_DET_SIDE_LEN,
+                           help=f"Longest image side used by text detection (default: {DEFAULT_DET_SIDE_LEN})")
+    ocr_group.add_argument("--no_mkldnn", dest="use_mkldnn", action="store_false",
+                           help="Disable MKL-DNN acceleration for OCR on CPU")
     args = parser.parse_args()
     
+    set_ocr_options(device=args.device, rec_batch_num=args.rec_batch_num, use_cls=args.use_cls,
+                    dpi=args.ocr_dpi, det_side_len=args.det_side_len, use_mkldnn=args.use_mkldnn)
+    
     # Convert size threshold from KB to bytes
     size_threshold = args.size_threshold * 1024
 
@@ -306,9 +608,10 @@ def main():
             logging.error(f"Input file is not a PDF: {args.input_file}")
             return
             
-        success = process_single_file(args.input_file, args.output_file, size_threshold)
-        if success:
-            logging.info(f"File processed successfully: {args.output_file}")
+        output_paths = process_single_file(args.input_file, args.output_file, size_threshold,
+                                           args.max_pages_per_docx)
+        if output_paths:
+            logging.info(f"File processed successfully: {', '.join(output_paths)}")
         else:
             logging.error(f"Failed to process file: {args.input_file}")
     
@@ -317,9 +620,10 @@ def main():
         if not os.path.exists(args.output_folder):
             os.makedirs(args.output_folder)
 
-        processed_files = process_files(args.input_folder, args.output_folder, args.max_workers)
+        processed_files = process_files(args.input_folder, args.output_folder, args.max_workers,
+                                        args.max_pages_per_docx)
         logging.info("Checking and fixing files...")
-        check_and_fix_files(processed_files, size_threshold)
+        check_and_fix_files(processed_files, size_threshold, args.max_pages_per_docx)
         logging.info("All files processed.")
     
     else: